@@ -49,7 +49,11 @@ def load_context_2022_10_13(folds=None, load_zeroshot_pred_proba=False) -> (Zero
     zeroshot_pred_proba = None
     zeroshot_gt = None
     if load_zeroshot_pred_proba:
-        path_zs_pred_proba = str(all_v3_results_root / 'zeroshot_pred_proba_2022_10_13_zs.pkl')
+        path_zs_pred_proba = all_v3_results_root / 'zeroshot_pred_proba_2022_10_13_zs'
+        if not path_zs_pred_proba.is_dir():
+            # Store created by `scripts/run_convert_zeroshot_pred_proba_to_store.py` is not available, load the pickle
+            path_zs_pred_proba = all_v3_results_root / 'zeroshot_pred_proba_2022_10_13_zs.pkl'
+        path_zs_pred_proba = str(path_zs_pred_proba)
         path_zs_gt = str(all_v3_results_root / 'zeroshot_gt_2022_10_13_zs.pkl')
         zeroshot_pred_proba, zeroshot_gt = zsc.load_zeroshot_pred_proba(path_pred_proba=path_zs_pred_proba,
                                                                         path_gt=path_zs_gt)
@@ -1,2 +1,3 @@
 from ._configs import load_configs
 from ._results import load_results, combine_results_with_score_val
+from ._pred_proba_store import ZeroshotPredProbaStore
@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+
+class ZeroshotPredProbaStore:
+    def __init__(self, path: str):
+        """
+        Stores zeroshot_pred_proba as a directory with one file per task and fold, so that only the tasks and folds
+        needed are loaded in memory instead of the full zeroshot_pred_proba pickle.
+        The prediction probabilities of all models of a task/fold are stored as one array per split, a task/fold is
+        loaded with the same format as zeroshot_pred_proba: a dictionary with keys "pred_proba_dict_val" and
+        "pred_proba_dict_test" mapping each model to its prediction probabilities.
+        :param path: directory of the store, files are stored as `{path}/{task}/{fold}.npz`
+        """
+        self.path = Path(path)
+
+    def _get_path(self, task: str, fold: int) -> Path:
+        return self.path / str(task) / f'{fold}.npz'
+
+    def save(self, zeroshot_pred_proba: dict):
+        """
+        Saves zeroshot_pred_proba formatted as `zeroshot_pred_proba[task][fold]['pred_proba_dict_val'][model]`, only
+        keys "pred_proba_dict_val" and "pred_proba_dict_test" are saved.
+        """
+        for task, zeroshot_pred_proba_task in zeroshot_pred_proba.items():
+            for fold, zeroshot_pred_proba_fold in zeroshot_pred_proba_task.items():
+                models = list(zeroshot_pred_proba_fold['pred_proba_dict_val'].keys())
+                path = self._get_path(task=task, fold=fold)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                np.savez_compressed(
+                    path,
+                    models=np.array(models),
+                    pred_proba_val=np.stack([zeroshot_pred_proba_fold['pred_proba_dict_val'][m] for m in models]),
+                    pred_proba_test=np.stack([zeroshot_pred_proba_fold['pred_proba_dict_test'][m] for m in models]),
+                )
+
+    def get_tasks(self) -> List[str]:
+        return sorted(p.name for p in self.path.iterdir() if p.is_dir())
+
+    def get_folds(self, task: str) -> List[int]:
+        return sorted(int(p.stem) for p in (self.path / str(task)).glob('*.npz'))
+
+    def load_task_fold(self, task: str, fold: int) -> dict:
+        with np.load(self._get_path(task=task, fold=fold)) as data:
+            models = [str(m) for m in data['models']]
+            pred_proba_val = data['pred_proba_val']
+            pred_proba_test = data['pred_proba_test']
+        return {
+            'pred_proba_dict_val': {m: pred_proba_val[i] for i, m in enumerate(models)},
+            'pred_proba_dict_test': {m: pred_proba_test[i] for i, m in enumerate(models)},
+        }
+
+    def load(self, tasks: List[str] = None, folds: List[int] = None) -> dict:
+        """
+        :param tasks: tasks to load, defaults to all tasks of the store.
+        :param folds: folds to load, defaults to all folds of each task. Folds missing in the store are skipped.
+        :return: zeroshot_pred_proba restricted to `tasks` and `folds`.
+        """
+        if tasks is None:
+            tasks = self.get_tasks()
+        zeroshot_pred_proba = {}
+        for task in tasks:
+            folds_task = self.get_folds(task=task)
+            if folds is not None:
+                folds_task = [f for f in folds_task if f in folds]
+            zeroshot_pred_proba[task] = {f: self.load_task_fold(task=task, fold=f) for f in folds_task}
+        return zeroshot_pred_proba
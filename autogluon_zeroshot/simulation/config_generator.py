@@ -1,4 +1,3 @@
-import copy
 import time
 from typing import List
 
@@ -7,20 +6,36 @@ import ray
 from sklearn.model_selection import KFold
 
 from .configuration_list_scorer import ConfigurationListScorer
+from .kernels import set_num_threads
 from .simulation_context import ZeroshotSimulatorContext
 
 
 @ray.remote
-def score_config_ray(config_scorer, existing_configs, new_config) -> float:
-    configs = existing_configs + [new_config]
-    score = config_scorer.score(configs)
-    return score
+class ConfigScorerActor:
+    def __init__(self, config_scorer):
+        """
+        Keeps a config scorer resident in a ray worker so that it is deserialized once rather than in every task.
+        """
+        # one actor is created per CPU, so each actor scores its candidates with a single thread
+        set_num_threads(1)
+        self.config_scorer = config_scorer
+
+    def score_batch(self, prior_configs, configs, start: int, end: int) -> np.ndarray:
+        return self.config_scorer.score_batch(prior_configs, configs[start:end])
+
+
+@ray.remote
+def run_fold_ray(zs_config_generator_cv, X_train, X_test, backend):
+    # folds already run in parallel, so each fold scores configs with a single thread
+    set_num_threads(1)
+    return zs_config_generator_cv.run_fold(X_train, X_test, backend=backend)
 
 
 class ZeroshotConfigGenerator:
     def __init__(self, config_scorer, configs: List[str], backend='ray'):
         self.config_scorer = config_scorer
         self.all_configs = configs
+        self.config_to_id = {config: i for i, config in enumerate(configs)}
         self.backend = backend
 
     def select_zeroshot_configs(self,
@@ -29,42 +44,82 @@ class ZeroshotConfigGenerator:
                                 removal_stage=True,
                                 removal_threshold=0,
                                 config_scorer_test=None,
+                                early_stopping_rounds: int = None,
+                                early_stopping_tol: float = 0,
                                 ) -> List[str]:
+        """
+        Greedily selects configurations until `num_zeroshot` configurations are selected.
+        :param num_zeroshot: number of configurations to select.
+        :param zeroshot_configs: configurations already selected, if any.
+        :param removal_stage: whether to prune selected configurations that do not improve the score at the end.
+        :param removal_threshold:
+        :param config_scorer_test: if specified, the test score is printed at each iteration.
+        :param early_stopping_rounds: if specified, selection stops before reaching `num_zeroshot` configurations
+        once the best score fails to improve by more than `early_stopping_tol` over the previous iteration for this
+        many consecutive iterations.
+        :param early_stopping_tol:
+        """
         if zeroshot_configs is None:
             zeroshot_configs = []
         else:
-            zeroshot_configs = copy.deepcopy(zeroshot_configs)
+            zeroshot_configs = list(zeroshot_configs)
 
         iteration = 0
+        prev_best_score = None
+        rounds_without_improvement = 0
         if self.backend == 'ray':
             if not ray.is_initialized():
                 ray.init()
-            config_scorer = ray.put(self.config_scorer)
+            num_actors = max(1, int(ray.cluster_resources().get('CPU', 1)))
+            config_scorer_ref = ray.put(self.config_scorer)
+            config_scorer = [ConfigScorerActor.remote(config_scorer_ref) for _ in range(num_actors)]
             selector = self._select_ray
         else:
             config_scorer = self.config_scorer
             selector = self._select_sequential
-        while len(zeroshot_configs) < num_zeroshot:
-            iteration += 1
-            # greedily search the config that would yield the lowest average rank if we were to evaluate it in combination
-            # with previously chosen configs.
+        # mask of the configs already selected, indexed by the position of configs in `all_configs`
+        is_taken = np.zeros(len(self.all_configs), dtype=bool)
+        for config in zeroshot_configs:
+            if config in self.config_to_id:
+                is_taken[self.config_to_id[config]] = True
+        try:
+            while len(zeroshot_configs) < num_zeroshot:
+                iteration += 1
+                # greedily search the config that would yield the lowest average rank if we were to evaluate it in
+                # combination with previously chosen configs.
 
-            valid_configs = [c for c in self.all_configs if c not in zeroshot_configs]
-            if not valid_configs:
-                break
+                valid_configs = [self.all_configs[i] for i in np.flatnonzero(~is_taken)]
+                if not valid_configs:
+                    break
 
 
-            time_start = time.time()
-            best_next_config, best_score = selector(valid_configs, zeroshot_configs, config_scorer)
-            time_end = time.time()
+                time_start = time.time()
+                best_next_config, best_score = selector(valid_configs, zeroshot_configs, config_scorer)
+                time_end = time.time()
 
-            zeroshot_configs.append(best_next_config)
-            msg = f'{iteration}\t: {round(best_score, 2)} | {round(time_end-time_start, 2)}s | {self.backend}'
-            if config_scorer_test:
-                score_test = config_scorer_test.score(zeroshot_configs)
-                msg += f'\tTest: {round(score_test, 2)}'
-            msg += f'\t{best_next_config}'
-            print(msg)
+                zeroshot_configs.append(best_next_config)
+                is_taken[self.config_to_id[best_next_config]] = True
+                msg = f'{iteration}\t: {round(best_score, 2)} | {round(time_end-time_start, 2)}s | {self.backend}'
+                if config_scorer_test:
+                    score_test = config_scorer_test.score(zeroshot_configs)
+                    msg += f'\tTest: {round(score_test, 2)}'
+                msg += f'\t{best_next_config}'
+                print(msg)
+
+                if early_stopping_rounds is not None:
+                    if prev_best_score is not None and best_score >= prev_best_score - early_stopping_tol:
+                        rounds_without_improvement += 1
+                    else:
+                        rounds_without_improvement = 0
+                    prev_best_score = best_score
+                    if rounds_without_improvement >= early_stopping_rounds:
+                        print(f'Stopping early, score did not improve for {rounds_without_improvement} iterations')
+                        break
+        finally:
+            # actors hold a copy of the scorer, make sure they are released even if selection fails or is interrupted
+            if self.backend == 'ray':
+                for actor in config_scorer:
+                    ray.kill(actor)
 
         if removal_stage:
             zeroshot_configs = self.prune_zeroshot_configs(zeroshot_configs, removal_threshold=removal_threshold)
@@ -73,43 +128,51 @@ class ZeroshotConfigGenerator:
 
     @staticmethod
     def _select_sequential(configs: list, prior_configs: list, config_scorer):
-        best_next_config = None
-        # todo could use np.inf but would need unit-test (also to check that ray/sequential returns the same selection)
-        best_score = 999999999
-        for config in configs:
-            config_selected = prior_configs + [config]
-            config_score = config_scorer.score(config_selected)
-            if config_score < best_score:
-                best_score = config_score
-                best_next_config = config
-        return best_next_config, best_score
+        # scores all candidates at once so that scorers can reuse work from the previous iteration
+        config_scores = config_scorer.score_batch(prior_configs, configs)
+        return ZeroshotConfigGenerator._select_best(configs, config_scores)
 
     @staticmethod
-    def _select_ray(configs: list, prior_configs: list, config_scorer):
-        # Create and execute all tasks in parallel
+    def _select_ray(configs: list, prior_configs: list, config_scorer: list):
+        """
+        :param config_scorer: list of `ConfigScorerActor`, candidates are split in even contiguous chunks, one batch
+        per actor, so that expensive scorers use as many actors as possible.
+        """
+        actors = config_scorer
+        num_chunks = min(len(configs), len(actors))
+        # configs are put in the object store once and each actor only receives the bounds of its chunk
+        prior_configs_ref = ray.put(prior_configs)
+        configs_ref = ray.put(configs)
+        chunk_bounds = np.linspace(0, len(configs), num_chunks + 1).astype(int)
         results = []
-        for i in range(len(configs)):
-            results.append(score_config_ray.remote(
-                config_scorer,
-                prior_configs,
-                configs[i],
+        for actor, start, end in zip(actors, chunk_bounds[:-1], chunk_bounds[1:]):
+            results.append(actor.score_batch.remote(
+                prior_configs_ref,
+                configs_ref,
+                int(start),
+                int(end),
             ))
-        result = ray.get(results)
-        result_idx_min = result.index(min(result))
-        best_next_config = configs[result_idx_min]
-        best_score = result[result_idx_min]
-        return best_next_config, best_score
+        result = np.concatenate(ray.get(results))
+        return ZeroshotConfigGenerator._select_best(configs, result)
+
+    @staticmethod
+    def _select_best(configs: list, config_scores) -> (str, float):
+        """
+        :return: the config with the lowest score and its score, the first one is returned in case of ties and configs
+        with a NaN score are never selected.
+        """
+        config_scores = np.fromiter(config_scores, dtype=np.float64, count=len(configs))
+        best_idx = int(np.nanargmin(config_scores))
+        return configs[best_idx], float(config_scores[best_idx])
 
     def prune_zeroshot_configs(self, zeroshot_configs: List[str], removal_threshold=0) -> List[str]:
-        zeroshot_configs = copy.deepcopy(zeroshot_configs)
+        zeroshot_configs = list(zeroshot_configs)
         best_score = self.config_scorer.score(zeroshot_configs)
         finished_removal = False
         while not finished_removal:
             best_remove_config = None
-            for config in zeroshot_configs:
-                config_selected = [c for c in zeroshot_configs if c != config]
-                config_score = self.config_scorer.score(config_selected)
-
+            config_scores = self.config_scorer.score_leave_one_out(zeroshot_configs)
+            for config, config_score in zip(zeroshot_configs, config_scores):
                 if best_remove_config is None:
                     if config_score <= (best_score + removal_threshold):
                         best_score = config_score
@@ -132,7 +195,8 @@ class ZeroshotConfigGeneratorCV:
                  zeroshot_simulator_context: ZeroshotSimulatorContext,
                  config_scorer: ConfigurationListScorer,
                  configs: List[str] = None,
-                 backend='ray'):
+                 backend='ray',
+                 parallel_folds: bool = False):
         """
         Runs zero-shot selection on `n_splits` ("train", "test") folds of datasets.
         For each split, zero-shot configurations are selected using the datasets belonging on the "train" split and the
@@ -142,10 +206,14 @@ class ZeroshotConfigGeneratorCV:
         :param config_scorer:
         :param configs:
         :param backend:
+        :param parallel_folds: if True and backend is 'ray', folds are run in parallel as ray tasks and configurations
+        are selected sequentially within each fold to avoid nesting ray tasks. This is faster when scoring
+        configurations is cheap (SingleBest) but slower when it is expensive (Ensemble) as fewer CPUs are used.
         """
         assert n_splits >= 2
         self.n_splits = n_splits
         self.backend = backend
+        self.parallel_folds = parallel_folds
         self.config_scorer = config_scorer
         self.unique_datasets_fold = np.array(config_scorer.datasets)
         self.unique_datasets_map = zeroshot_simulator_context.dataset_name_to_tid_dict
@@ -169,9 +237,8 @@ class ZeroshotConfigGeneratorCV:
         self.kf = KFold(n_splits=self.n_splits, random_state=0, shuffle=True)
 
     def run(self):
-        fold_results = []
-        for i, (train_index, test_index) in enumerate(self.kf.split(self.unique_datasets)):
-            print(f'Fitting Fold {i+1}...')
+        folds = []
+        for train_index, test_index in self.kf.split(self.unique_datasets):
             X_train, X_test = list(self.unique_datasets[train_index]), list(self.unique_datasets[test_index])
             X_train_fold = []
             X_test_fold = []
@@ -179,7 +246,27 @@ class ZeroshotConfigGeneratorCV:
                 X_train_fold += self.dataset_parent_to_fold_map[d]
             for d in X_test:
                 X_test_fold += self.dataset_parent_to_fold_map[d]
-            zeroshot_configs_fold, score_fold = self.run_fold(X_train_fold, X_test_fold)
+            folds.append((X_train, X_test, X_train_fold, X_test_fold))
+
+        if self.backend == 'ray' and self.parallel_folds:
+            if not ray.is_initialized():
+                ray.init()
+            print(f'Fitting {len(folds)} Folds in parallel...')
+            zs_config_generator_cv = ray.put(self)
+            fold_outputs = ray.get([
+                run_fold_ray.remote(zs_config_generator_cv, X_train_fold, X_test_fold, 'sequential')
+                for _, _, X_train_fold, X_test_fold in folds
+            ])
+        else:
+            fold_outputs = []
+            for i, (_, _, X_train_fold, X_test_fold) in enumerate(folds):
+                print(f'Fitting Fold {i+1}...')
+                fold_outputs.append(self.run_fold(X_train_fold, X_test_fold))
+
+        fold_results = []
+        for i, (fold, fold_output) in enumerate(zip(folds, fold_outputs)):
+            X_train, X_test, X_train_fold, X_test_fold = fold
+            zeroshot_configs_fold, score_fold = fold_output
             results_fold = {
                 'fold': i+1,
                 'X_train': X_train,
@@ -192,13 +279,15 @@ class ZeroshotConfigGeneratorCV:
             fold_results.append(results_fold)
         return fold_results
 
-    def run_fold(self, X_train, X_test):
+    def run_fold(self, X_train, X_test, backend: str = None):
+        if backend is None:
+            backend = self.backend
         config_scorer_train = self.config_scorer.subset(datasets=X_train)
         config_scorer_test = self.config_scorer.subset(datasets=X_test)
 
         zs_config_generator = ZeroshotConfigGenerator(config_scorer=config_scorer_train,
                                                       configs=self.configs,
-                                                      backend=self.backend)
+                                                      backend=backend)
 
         zeroshot_configs = zs_config_generator.select_zeroshot_configs(10,
                                                                        removal_stage=False,
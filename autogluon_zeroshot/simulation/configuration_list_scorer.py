@@ -1,5 +1,7 @@
 from typing import List
 
+import numpy as np
+
 from autogluon_zeroshot.simulation.simulation_context import ZeroshotSimulatorContext
 
 
@@ -23,5 +25,38 @@ class ConfigurationListScorer:
         """
         raise NotImplementedError()
 
+    def get_incremental_state(self, configs: List[str]):
+        """
+        :param configs: list of configurations already selected.
+        :return: a state summarizing `configs` that can be passed to `incremental_score` to score `configs` extended
+        with one more configuration without re-evaluating `configs`. By default, the state is the list of
+        configurations itself and `incremental_score` falls back to `score`.
+        """
+        return list(configs)
+
+    def incremental_score(self, state, config: str) -> float:
+        """
+        :param state: state returned by `get_incremental_state(configs)`.
+        :param config: configuration to add to `configs`.
+        :return: the score of `configs + [config]`.
+        """
+        return self.score(state + [config])
+
+    def score_batch(self, prior_configs: List[str], configs: List[str]) -> np.ndarray:
+        """
+        :param prior_configs: list of configurations already selected.
+        :param configs: list of candidate configurations.
+        :return: array containing the score of `prior_configs + [config]` for each config in `configs`.
+        """
+        state = self.get_incremental_state(prior_configs)
+        return np.array([self.incremental_score(state, config) for config in configs], dtype=np.float64)
+
+    def score_leave_one_out(self, configs: List[str]) -> np.ndarray:
+        """
+        :param configs: list of configurations.
+        :return: array containing, for each configuration of `configs`, the score of `configs` without it.
+        """
+        return np.array([self.score(configs[:i] + configs[i + 1:]) for i in range(len(configs))], dtype=np.float64)
+
     def subset(self, datasets: List[str]) -> "ConfigurationListScorer":
-        raise NotImplementedError()
\ No newline at end of file
+        raise NotImplementedError()
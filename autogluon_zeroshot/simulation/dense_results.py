@@ -0,0 +1,61 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class DenseResults:
+    def __init__(self, configs: List[str], datasets: List[str], matrices: Dict[str, np.ndarray]):
+        """
+        Dense view of the results of base models on multiple datasets/folds, used to score configurations with numpy
+        operations rather than pandas indexing.
+        :param configs: list of configurations, the i-th configuration corresponds to the i-th row of each matrix.
+        :param datasets: list of datasets/folds, the j-th dataset corresponds to the j-th column of each matrix.
+        :param matrices: dictionary from result column (for instance "metric_error" or "rank") to a matrix of shape
+        (len(configs), len(datasets)), missing results are NaN.
+        """
+        self.configs = list(configs)
+        self.datasets = list(datasets)
+        self.matrices = matrices
+        self.config_to_row = {config: i for i, config in enumerate(self.configs)}
+        self.dataset_to_col = {dataset: i for i, dataset in enumerate(self.datasets)}
+
+    @classmethod
+    def from_df(cls,
+                df_results_by_dataset: pd.DataFrame,
+                values: List[str],
+                datasets: List[str] = None,
+                model_col: str = 'framework',
+                dataset_col: str = 'dataset') -> "DenseResults":
+        """
+        :param df_results_by_dataset: dataframe with results on base models on each dataset/fold.
+        :param values: result columns to store as dense matrices.
+        :param datasets: datasets/folds to consider and their column order, defaults to all datasets in order of
+        appearance.
+        :param model_col:
+        :param dataset_col:
+        """
+        if datasets is None:
+            datasets = list(df_results_by_dataset[dataset_col].unique())
+        df_pivot = df_results_by_dataset.pivot_table(index=model_col, columns=dataset_col, values=values)
+        matrices = {
+            value: df_pivot[value].reindex(columns=datasets).to_numpy(dtype=np.float64)
+            for value in values
+        }
+        return cls(configs=list(df_pivot.index), datasets=datasets, matrices=matrices)
+
+    def get_rows(self, configs: List[str]) -> np.ndarray:
+        return np.array([self.config_to_row[config] for config in configs], dtype=np.int64)
+
+    def subset(self, datasets: List[str]) -> "DenseResults":
+        """
+        :param datasets:
+        :return: dense results only containing the columns of the datasets passed as argument, in the same order.
+        Columns are copied once into contiguous matrices so that scoring the subset does not index the full matrices.
+        """
+        cols = np.array([self.dataset_to_col[dataset] for dataset in datasets], dtype=np.int64)
+        return self.__class__(
+            configs=self.configs,
+            datasets=datasets,
+            matrices={value: np.ascontiguousarray(matrix[:, cols]) for value, matrix in self.matrices.items()},
+        )
@@ -43,6 +43,14 @@ class EnsembleSelectionConfigScorer(ConfigurationListScorer):
             **kwargs,
         )
 
+    @staticmethod
+    def _upcast_pred_proba(pred_proba):
+        # prediction probabilities may be stored in float16 to save memory, ensembling and metrics are computed in
+        # float32 to avoid precision issues
+        if getattr(pred_proba, 'dtype', None) == np.float16:
+            return pred_proba.astype(np.float32)
+        return pred_proba
+
     def run_dataset(self, dataset, models):
         fold = self.dataset_name_to_fold_dict[dataset]
         dataset = self.dataset_name_to_tid_dict[dataset]
@@ -64,11 +72,11 @@ class EnsembleSelectionConfigScorer(ConfigurationListScorer):
 
         a = []
         for m in models:
-            a.append(pred_proba_dict_val[m])
+            a.append(self._upcast_pred_proba(pred_proba_dict_val[m]))
         weighted_ensemble.fit(predictions=a, labels=y_val)
         b = []
         for m in models:
-            b.append(pred_proba_dict_test[m])
+            b.append(self._upcast_pred_proba(pred_proba_dict_test[m]))
         y_test_pred = weighted_ensemble.predict_proba(b)
         y_test = y_test.fillna(-1)
         err = eval_metric._optimum - eval_metric(y_test, y_test_pred)  # FIXME: proba or pred, figure out
@@ -0,0 +1,80 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _score_sums_numpy(best_val: np.ndarray,
+                      best_score: np.ndarray,
+                      val_matrix: np.ndarray,
+                      score_matrix: np.ndarray,
+                      rows: np.ndarray,
+                      cols: np.ndarray) -> (np.ndarray, np.ndarray):
+    idx = np.ix_(rows, cols)
+    scores = np.where(val_matrix[idx] > best_val, score_matrix[idx], best_score)
+    is_valid = ~np.isnan(scores)
+    return np.where(is_valid, scores, 0).sum(axis=1), is_valid.sum(axis=1)
+
+
+if numba is not None:
+    # the default TBB threading layer hangs at exit when ray is started in a process where the kernel already ran, for
+    # instance when sequential and ray backends are mixed in a notebook, the workqueue layer is used as it is fork-safe
+    numba.config.THREADING_LAYER = 'workqueue'
+
+    # fastmath is not used as it assumes that there are no NaN, which are used for missing scores. The compiled kernel
+    # is cached on disk so that it is only compiled once rather than in every process, for instance ray workers.
+    @numba.njit(parallel=True, cache=True)
+    def _score_sums_numba(best_val, best_score, val_matrix, score_matrix, rows, cols):
+        num_rows = len(rows)
+        sums = np.zeros(num_rows, dtype=np.float64)
+        counts = np.zeros(num_rows, dtype=np.int64)
+        for i in numba.prange(num_rows):
+            row = rows[i]
+            row_sum = 0.0
+            row_count = 0
+            for j in range(len(cols)):
+                col = cols[j]
+                if val_matrix[row, col] > best_val[j]:
+                    score = score_matrix[row, col]
+                else:
+                    score = best_score[j]
+                if not np.isnan(score):
+                    row_sum += score
+                    row_count += 1
+            sums[i] = row_sum
+            counts[i] = row_count
+        return sums, counts
+
+
+def set_num_threads(num_threads: int):
+    """
+    Limits the number of threads used by the numba kernel. Should be set to 1 in processes that already run in
+    parallel, such as ray workers, to avoid oversubscribing CPUs as numba uses all cores by default.
+    """
+    if numba is not None:
+        numba.set_num_threads(num_threads)
+
+
+def score_sums(best_val: np.ndarray,
+               best_score: np.ndarray,
+               val_matrix: np.ndarray,
+               score_matrix: np.ndarray,
+               rows: np.ndarray,
+               cols: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Scores candidate configurations when added to already selected configurations, the candidate is picked on a
+    dataset if its validation score is strictly better than the one of the selected configurations.
+    Uses a parallel numba kernel if numba is installed and numpy otherwise.
+    :param best_val: validation scores of the selected configurations on the datasets `cols`.
+    :param best_score: scores of the selected configurations on the datasets `cols`.
+    :param val_matrix: validation scores of shape (n_configs, n_datasets).
+    :param score_matrix: scores of shape (n_configs, n_datasets).
+    :param rows: rows of the candidate configurations.
+    :param cols: columns of the datasets to consider.
+    :return: for each candidate, the sum and the number of non-missing scores over the datasets `cols`.
+    """
+    if numba is not None:
+        return _score_sums_numba(best_val, best_score, val_matrix, score_matrix, rows, cols)
+    return _score_sums_numpy(best_val, best_score, val_matrix, score_matrix, rows, cols)
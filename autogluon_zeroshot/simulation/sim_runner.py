@@ -3,13 +3,15 @@ from .config_generator import ZeroshotConfigGeneratorCV
 from .simulation_context import ZeroshotSimulatorContext
 
 
-def run_zs_simulation(zsc: ZeroshotSimulatorContext, config_scorer, n_splits=10, configs=None, backend='ray') -> list:
+def run_zs_simulation(zsc: ZeroshotSimulatorContext, config_scorer, n_splits=10, configs=None, backend='ray',
+                      parallel_folds=False) -> list:
     zs_config_generator_cv = ZeroshotConfigGeneratorCV(
         n_splits=n_splits,
         zeroshot_simulator_context=zsc,
         config_scorer=config_scorer,
         configs=configs,
         backend=backend,
+        parallel_folds=parallel_folds,
     )
 
     results = zs_config_generator_cv.run()
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -23,3 +24,25 @@ def filter_datasets(df_results_by_dataset, df_raw, datasets: set):
     df_results_by_dataset = df_results_by_dataset[df_results_by_dataset['dataset'].isin(datasets)]
     df_raw = df_raw[df_raw['tid_new'].isin(datasets)]
     return df_results_by_dataset, df_raw
+
+
+def stack_pred_proba_dict(pred_proba_dict: dict, dtype=None) -> dict:
+    """
+    Stacks the prediction probabilities of all models into a single contiguous array of shape (n_models, ...) and
+    returns a dictionary from model to its row in this array. Prediction probabilities are left as is if they do not
+    all share the same shape and dtype.
+    :param pred_proba_dict: dictionary from model to its prediction probabilities.
+    :param dtype: if specified, prediction probabilities are cast to this dtype, for instance `np.float16` to halve
+    memory usage.
+    """
+    pred_probas = list(pred_proba_dict.values())
+    if not pred_probas or not all(isinstance(p, np.ndarray) for p in pred_probas):
+        return pred_proba_dict
+    if len({(p.shape, p.dtype) for p in pred_probas}) > 1:
+        if dtype is None:
+            return pred_proba_dict
+        return {model: pred_proba.astype(dtype, copy=False) for model, pred_proba in pred_proba_dict.items()}
+    pred_proba_stacked = np.stack(pred_probas)
+    if dtype is not None:
+        pred_proba_stacked = pred_proba_stacked.astype(dtype, copy=False)
+    return {model: pred_proba_stacked[i] for i, model in enumerate(pred_proba_dict.keys())}
@@ -1,11 +1,15 @@
+import os
 import pickle
 import sys
 from typing import Optional, List
 
+import numpy as np
 import pandas as pd
 from autogluon.common.loaders import load_pkl
 
-from .sim_utils import get_dataset_to_tid_dict, get_dataset_name_to_tid_dict, filter_datasets
+from ..loaders import ZeroshotPredProbaStore
+from .dense_results import DenseResults
+from .sim_utils import get_dataset_to_tid_dict, get_dataset_name_to_tid_dict, filter_datasets, stack_pred_proba_dict
 from ..utils.rank_utils import RankScorer
 
 
@@ -40,6 +44,14 @@ class ZeroshotSimulatorContext:
             folds=folds,
         )
 
+        # dense (configs x datasets) view of the results, computed once so that scorers index numpy arrays rather than
+        # dataframes in the selection loop
+        self.dense_results = DenseResults.from_df(
+            df_results_by_dataset=self.df_results_by_dataset_vs_automl,
+            values=['metric_error', 'rank', 'score_val'],
+            datasets=self.unique_dataset_folds,
+        )
+
         tmp = self.df_results_by_dataset_vs_automl[['dataset', 'tid', 'problem_type']]
         self.dataset_to_problem_type_dict = tmp[['dataset', 'problem_type']].drop_duplicates().set_index(
             'dataset').squeeze().to_dict()
@@ -49,14 +61,16 @@ class ZeroshotSimulatorContext:
     @staticmethod
     def align_valid_folds(df_results_by_dataset, df_results_by_dataset_automl, df_raw, folds):
         df_results_by_dataset = df_results_by_dataset[df_results_by_dataset['fold'].isin(folds)]
-        unique_dataset_folds_set = set(list(df_results_by_dataset['dataset'].unique()))
+        # unique datasets are computed once and reused, in order of appearance to keep a deterministic order
+        dataset_folds = pd.unique(df_results_by_dataset['dataset'].to_numpy())
         df_results_by_dataset_automl = df_results_by_dataset_automl[
-            df_results_by_dataset_automl['dataset'].isin(unique_dataset_folds_set)]
+            df_results_by_dataset_automl['dataset'].isin(dataset_folds)]
 
-        unique_dataset_folds_set = set(list(df_results_by_dataset_automl['dataset'].unique()))
+        dataset_folds_automl_set = set(pd.unique(df_results_by_dataset_automl['dataset'].to_numpy()).tolist())
+        dataset_folds = [dataset for dataset in dataset_folds.tolist() if dataset in dataset_folds_automl_set]
         df_results_by_dataset, df_raw = filter_datasets(df_results_by_dataset=df_results_by_dataset,
                                                         df_raw=df_raw,
-                                                        datasets=unique_dataset_folds_set)
+                                                        datasets=dataset_folds_automl_set)
 
         a = df_results_by_dataset[['tid', 'fold']].drop_duplicates()
         a = a[a['fold'].isin(folds)]
@@ -68,32 +82,25 @@ class ZeroshotSimulatorContext:
             'fold'].to_dict()
 
         dataset_name_to_tid_dict = get_dataset_name_to_tid_dict(df_raw=df_raw)
-        unique_dataset_folds = []
         unique_datasets_set = set(unique_datasets)
-        for dataset in unique_dataset_folds_set:
-            if dataset_name_to_tid_dict[dataset] in unique_datasets_set:
-                unique_dataset_folds.append(dataset)
+        unique_dataset_folds = [dataset for dataset in dataset_folds
+                                if dataset_name_to_tid_dict[dataset] in unique_datasets_set]
         unique_dataset_folds_set = set(unique_dataset_folds)
 
         df_results_by_dataset, df_raw = filter_datasets(df_results_by_dataset=df_results_by_dataset,
                                                         df_raw=df_raw,
                                                         datasets=unique_dataset_folds_set)
 
-        dataset_name_to_tid_dict = get_dataset_name_to_tid_dict(df_raw=df_raw)
+        dataset_name_to_tid_dict = {dataset: dataset_name_to_tid_dict[dataset] for dataset in unique_dataset_folds}
         dataset_to_tid_dict = get_dataset_to_tid_dict(df_raw=df_raw)
 
-        automl_error_dict = {}
-        for i, dataset in enumerate(unique_dataset_folds):
-            automl_error_list = sorted(
-                list(df_results_by_dataset_automl[df_results_by_dataset_automl['dataset'] == dataset]['metric_error']))
-            automl_error_dict[dataset] = automl_error_list
-
         rank_scorer_vs_automl = RankScorer(df_results_by_dataset=df_results_by_dataset_automl,
                                            datasets=unique_dataset_folds)
         df_results_by_dataset_vs_automl = df_results_by_dataset.copy()
-        df_results_by_dataset_vs_automl['rank'] = [rank_scorer_vs_automl.rank(r[1], r[0]) for r in
-                                                   zip(df_results_by_dataset_vs_automl['metric_error'],
-                                                       df_results_by_dataset_vs_automl['dataset'])]
+        # ranks all configs of a dataset against the automl errors with a single binary search
+        df_results_by_dataset_vs_automl['rank'] = df_results_by_dataset_vs_automl.groupby('dataset')['metric_error'].transform(
+            lambda errors: rank_scorer_vs_automl.rank_batch(errors.name, errors.to_numpy(dtype=np.float64))
+        )
 
         return (
             df_results_by_dataset_vs_automl,
@@ -142,11 +149,20 @@ class ZeroshotSimulatorContext:
     def load_zeroshot_pred_proba(self, path_pred_proba, path_gt):
         """
         Loads zeroshot_pred_proba and zeroshot_gt. Minimizes memory usage by popping folds not in self.folds_to_use
+        :param path_pred_proba: path to the zeroshot_pred_proba pickle or to a directory saved with
+        `ZeroshotPredProbaStore`, in which case only the tasks and folds used are loaded.
+        :param path_gt: path to the zeroshot_gt pickle.
         """
         print('Loading zeroshot...')
         zeroshot_gt = load_pkl.load(path_gt)
-        # NOTE: This file is BIG (17 GB)
-        zeroshot_pred_proba = load_pkl.load(path_pred_proba)
+        if os.path.isdir(path_pred_proba):
+            zeroshot_pred_proba_store = ZeroshotPredProbaStore(path=path_pred_proba)
+            tasks = [k for k in zeroshot_pred_proba_store.get_tasks() if k in self.dataset_to_tid_dict and
+                     self.dataset_name_to_tid_dict[self.dataset_to_tid_dict[k]] in self.unique_datasets]
+            zeroshot_pred_proba = zeroshot_pred_proba_store.load(tasks=tasks, folds=self.folds)
+        else:
+            # NOTE: This file is BIG (17 GB)
+            zeroshot_pred_proba = load_pkl.load(path_pred_proba)
         print('Loading zeroshot successful!')
 
         zeroshot_gt = {k: v for k, v in zeroshot_gt.items() if k in self.dataset_to_tid_dict}
@@ -180,9 +196,13 @@ class ZeroshotSimulatorContext:
         return zeroshot_pred_proba, zeroshot_gt
 
     @staticmethod
-    def minimize_memory_zeroshot_pred_proba(zeroshot_pred_proba: dict, configs: list):
+    def minimize_memory_zeroshot_pred_proba(zeroshot_pred_proba: dict, configs: list, dtype=None):
         """
         Minimizes memory usage of zeroshot_pred_proba by popping all model keys not in the input configs list.
+        The prediction probabilities of the remaining models of each task/fold are then stacked into a single
+        contiguous array, the model dictionaries map each model to its row in this array.
+        If `dtype` is specified, prediction probabilities are cast to it, `np.float16` halves memory usage and is
+        precise enough for rank-based scoring.
 
         Note: Performs inplace edits.
         """
@@ -198,6 +218,9 @@ class ZeroshotSimulatorContext:
                     if k not in configs:
                         zeroshot_pred_proba[t][f]['pred_proba_dict_val'].pop(k)
                         zeroshot_pred_proba[t][f]['pred_proba_dict_test'].pop(k)
+                for split in ['pred_proba_dict_val', 'pred_proba_dict_test']:
+                    zeroshot_pred_proba[t][f][split] = stack_pred_proba_dict(zeroshot_pred_proba[t][f][split],
+                                                                            dtype=dtype)
         size_bytes = sys.getsizeof(pickle.dumps(zeroshot_pred_proba, protocol=4))
         print(f'NEW zeroshot_pred_proba Size: {round(size_bytes / 1e6, 3)} MB')
         return zeroshot_pred_proba
@@ -1,8 +1,11 @@
 from typing import List
 
+import numpy as np
 import pandas as pd
 
 from .configuration_list_scorer import ConfigurationListScorer
+from .dense_results import DenseResults
+from .kernels import score_sums
 from .simulation_context import ZeroshotSimulatorContext
 
 
@@ -13,7 +16,8 @@ class SingleBestConfigScorer(ConfigurationListScorer):
                  score_col: str = 'rank',
                  score_val_col: str = 'score_val',
                  model_col: str = 'framework',
-                 dataset_col: str = 'dataset'):
+                 dataset_col: str = 'dataset',
+                 dense_results: DenseResults = None):
         """
         Enables to score the best configuration from a given list of configuration.
         The configuration selected is the one with the lowest validation score is selected and its test-score
@@ -24,6 +28,8 @@ class SingleBestConfigScorer(ConfigurationListScorer):
         :param score_val_col:
         :param model_col:
         :param dataset_col:
+        :param dense_results: precomputed dense results containing `score_col` and `score_val_col`, computed from
+        `df_results_by_dataset` if not passed.
         """
         super(SingleBestConfigScorer, self).__init__(datasets=datasets)
 
@@ -37,18 +43,48 @@ class SingleBestConfigScorer(ConfigurationListScorer):
                 df_results_by_dataset[dataset_col].isin(datasets)]
         self.df_results_by_dataset = df_results_by_dataset
         self.datasets = list(self.df_results_by_dataset[dataset_col].unique())
-        self.df_pivot_val = self.df_results_by_dataset.pivot_table(index=self.model_col, columns=self.dataset_col, values=self.score_val_col)
+        if dense_results is None or any(col not in dense_results.matrices for col in [score_col, score_val_col]):
+            dense_results = DenseResults.from_df(
+                df_results_by_dataset=self.df_results_by_dataset,
+                values=[score_val_col, score_col],
+                datasets=self.datasets,
+                model_col=model_col,
+                dataset_col=dataset_col,
+            )
+        else:
+            dense_results = dense_results.subset(datasets=self.datasets)
+        self.dense_results = dense_results
+
+        # dense (configs x datasets) matrices used to score configurations, missing validation scores are set to -inf
+        # so that they are never selected
+        self.val_matrix = np.nan_to_num(dense_results.matrices[score_val_col], nan=-np.inf)
+        self.score_matrix = dense_results.matrices[score_col]
+        # sums computed by the last call of `score_batch`, used to only update datasets that changed in the next call
+        self._score_batch_cache = None
 
     @classmethod
     def from_zsc(cls, zeroshot_simulator_context: ZeroshotSimulatorContext, **kwargs):
         return cls(
             df_results_by_dataset=zeroshot_simulator_context.df_results_by_dataset_vs_automl,
+            dense_results=zeroshot_simulator_context.dense_results,
             **kwargs,
         )
 
+    def _get_best_validation_rows(self, configs: List[str]) -> (np.ndarray, np.ndarray):
+        """
+        :return: the rows of `configs` in the dense matrices and, for each dataset, the index in `configs` of the
+        configuration with the best validation score (the first one in case of ties).
+        """
+        rows = self.dense_results.get_rows(configs)
+        return rows, self.val_matrix[rows].argmax(axis=0)
+
     def get_best_validation_configs_df(self, configs: list) -> pd.DataFrame:
-        best_val_model_series = self.df_pivot_val.loc[configs].idxmax(axis=0).to_frame(name=self.model_col)
-        best_val_model_by_dataset_df = self.df_results_by_dataset.merge(best_val_model_series, on=[self.dataset_col, self.model_col])
+        _, best_idx = self._get_best_validation_rows(configs)
+        best_val_model_df = pd.DataFrame({
+            self.dataset_col: self.datasets,
+            self.model_col: np.array(configs)[best_idx],
+        })
+        best_val_model_by_dataset_df = self.df_results_by_dataset.merge(best_val_model_df, on=[self.dataset_col, self.model_col])
         return best_val_model_by_dataset_df
 
     def score_per_dataset(self, configs: List[str], score_col=None) -> dict:
@@ -64,12 +100,115 @@ class SingleBestConfigScorer(ConfigurationListScorer):
         :return: the test-error selected with validation scores making sure that the test scores of each model are not
         used for the selection.
         """
-        best_val_model_by_dataset_df = self.get_best_validation_configs_df(configs=configs)
+        rows, best_idx = self._get_best_validation_rows(configs)
         # this is the error without knowing the test score of each model and oracle picking the best,
         # instead using validation score to pick best
-        avg_error_real = best_val_model_by_dataset_df[self.score_col].mean()
+        scores = self.score_matrix[rows[best_idx], np.arange(len(self.datasets))]
+        avg_error_real = float(np.nanmean(scores))
         return avg_error_real
 
+    def get_incremental_state(self, configs: List[str]) -> (np.ndarray, np.ndarray):
+        """
+        :param configs: list of configurations already selected.
+        :return: the validation score and the score of the configuration with the best validation score among
+        `configs` on each dataset.
+        """
+        num_datasets = len(self.datasets)
+        if not configs:
+            return np.full(num_datasets, -np.inf), np.full(num_datasets, np.nan)
+        rows, best_idx = self._get_best_validation_rows(configs)
+        best_rows = rows[best_idx]
+        cols = np.arange(num_datasets)
+        return self.val_matrix[best_rows, cols], self.score_matrix[best_rows, cols]
+
+    def incremental_score(self, state: (np.ndarray, np.ndarray), config: str) -> float:
+        """
+        :param state: validation scores and scores of the selected configurations, see `get_incremental_state`.
+        :param config: configuration to add to the selected configurations.
+        :return: the score obtained when adding `config`, the configuration selected on a dataset only changes if
+        `config` has a strictly better validation score which matches the tie-breaking of `score`.
+        """
+        best_val, best_score = state
+        row = self.dense_results.config_to_row[config]
+        scores = np.where(self.val_matrix[row] > best_val, self.score_matrix[row], best_score)
+        return float(np.nanmean(scores))
+
+    def _score_sums(self,
+                    best_val: np.ndarray,
+                    best_score: np.ndarray,
+                    rows: np.ndarray,
+                    cols: np.ndarray = None) -> (np.ndarray, np.ndarray):
+        """
+        :return: for each candidate row, the sum and the number of non-missing scores over the datasets `cols`
+        (all datasets if None) when the candidate is added to configurations with validation scores `best_val` and
+        scores `best_score` on those datasets.
+        """
+        if cols is None:
+            cols = np.arange(len(self.datasets))
+        return score_sums(best_val, best_score, self.val_matrix, self.score_matrix, rows, cols)
+
+    def score_batch(self, prior_configs: List[str], configs: List[str]) -> np.ndarray:
+        """
+        Vectorized version of `incremental_score` evaluating all candidate configurations at once.
+
+        Greedy selection calls this method with `prior_configs` growing by one configuration at each iteration. In
+        this case, the selected configuration only changes on datasets where the last added configuration has a
+        better validation score, so the sums of the previous call are only updated on those datasets. Candidates
+        close to the best score are then re-scored on all datasets so that rounding errors cannot change which
+        candidate is the best.
+        """
+        best_val, best_score = self.get_incremental_state(prior_configs)
+        rows = self.dense_results.get_rows(configs)
+        cache = self._score_batch_cache
+        is_incremental = (
+            cache is not None
+            and len(prior_configs) == len(cache['prior_configs']) + 1
+            and list(prior_configs[:-1]) == cache['prior_configs']
+            and all(config in cache['config_to_idx'] for config in configs)
+        )
+        if is_incremental:
+            idx = np.array([cache['config_to_idx'][config] for config in configs], dtype=np.int64)
+            changed = np.flatnonzero(best_val != cache['best_val'])
+            old_sums, old_counts = self._score_sums(cache['best_val'][changed], cache['best_score'][changed], rows, changed)
+            new_sums, new_counts = self._score_sums(best_val[changed], best_score[changed], rows, changed)
+            sums = cache['sums'][idx] - old_sums + new_sums
+            counts = cache['counts'][idx] - old_counts + new_counts
+            with np.errstate(invalid='ignore', divide='ignore'):
+                scores = sums / counts
+            if not np.isnan(scores).all():
+                close = np.flatnonzero(scores <= np.nanmin(scores) + 1e-8)
+                sums[close], counts[close] = self._score_sums(best_val, best_score, rows[close])
+        else:
+            sums, counts = self._score_sums(best_val, best_score, rows)
+        self._score_batch_cache = dict(
+            prior_configs=list(prior_configs),
+            best_val=best_val,
+            best_score=best_score,
+            config_to_idx={config: i for i, config in enumerate(configs)},
+            sums=sums,
+            counts=counts,
+        )
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums / counts
+
+    def score_leave_one_out(self, configs: List[str]) -> np.ndarray:
+        """
+        Vectorized version of `ConfigurationListScorer.score_leave_one_out`. On each dataset, removing a configuration
+        only changes the score if it is the one with the best validation score, in which case the configuration with
+        the second best validation score is selected instead.
+        """
+        if len(configs) < 2:
+            return super().score_leave_one_out(configs)
+        rows = self.dense_results.get_rows(configs)
+        # stable sort so that the first configuration wins ties, as in `score`
+        order = np.argsort(-self.val_matrix[rows], axis=0, kind='stable')
+        cols = np.arange(len(self.datasets))
+        score_first = self.score_matrix[rows[order[0]], cols]
+        score_second = self.score_matrix[rows[order[1]], cols]
+        is_first = order[0][None, :] == np.arange(len(configs))[:, None]
+        scores = np.where(is_first, score_second, score_first)
+        return np.nanmean(scores, axis=1)
+
     def subset(self, datasets: List[str]) -> "SingleBestConfigScorer":
         """
         :param datasets:
@@ -83,5 +222,8 @@ class SingleBestConfigScorer(ConfigurationListScorer):
             score_val_col=self.score_val_col,
             model_col=self.model_col,
             dataset_col=self.dataset_col,
+            # the columns of the datasets are sliced from the dense matrices of this scorer instead of pivoting the
+            # results again
+            dense_results=self.dense_results,
         )
 
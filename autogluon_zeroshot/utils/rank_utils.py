@@ -1,5 +1,6 @@
 from typing import List
 
+import numpy as np
 import pandas as pd
 
 
@@ -17,16 +18,33 @@ def get_rank(error: float, error_lst: List[float], higher_is_better: bool = Fals
     return rank
 
 
+def get_rank_sorted(errors: np.ndarray, error_arr_sorted: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of `get_rank` for lower is better errors.
+    :param errors: errors to rank.
+    :param error_arr_sorted: errors to rank against, sorted in ascending order.
+    :return: array with the rank of each error, ties count as half. As in `get_rank`, NaN errors have rank 1 and NaN
+    errors in `error_arr_sorted` are ignored.
+    """
+    num_lower = np.searchsorted(error_arr_sorted, errors, side='left')
+    num_lower_or_equal = np.searchsorted(error_arr_sorted, errors, side='right')
+    # searchsorted places NaN after all errors whereas NaN never compares greater in `get_rank`
+    return np.where(np.isnan(errors), 1.0, 1 + 0.5 * (num_lower + num_lower_or_equal))
+
+
 class RankScorer:
     def __init__(self,
                  df_results_by_dataset: pd.DataFrame,
                  datasets: List[str],
                  metric_error_col: str = 'metric_error',
                  dataset_col: str = 'dataset'):
-        self.error_dict  = {}
-        for i, dataset in enumerate(datasets):
-            automl_error_list = sorted(list(df_results_by_dataset[df_results_by_dataset[dataset_col] == dataset][metric_error_col]))
-            self.error_dict[dataset] = automl_error_list
+        # groups errors by dataset in a single pass rather than filtering the dataframe once per dataset
+        error_groups = df_results_by_dataset[df_results_by_dataset[dataset_col].isin(datasets)].groupby(dataset_col)[metric_error_col]
+        error_dict = {dataset: np.sort(errors.to_numpy(dtype=np.float64)) for dataset, errors in error_groups}
+        self.error_dict = {dataset: error_dict.get(dataset, np.array([], dtype=np.float64)) for dataset in datasets}
+
+    def rank_batch(self, dataset: str, errors: np.ndarray) -> np.ndarray:
+        return get_rank_sorted(errors, self.error_dict[dataset])
 
     def rank(self, dataset: str, error: float) -> float:
         rank = get_rank(error, self.error_dict[dataset])
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+from autogluon.common.loaders import load_pkl
+
+from autogluon_zeroshot.loaders import ZeroshotPredProbaStore
+
+
+if __name__ == '__main__':
+    result_root = Path(__file__).parent.parent / 'data' / 'results' / 'all_v3'
+
+    # Converts the zeroshot_pred_proba pickle (17 GB) to a directory with one file per task and fold so that
+    # simulations only load the tasks and folds they use.
+    # Note: Requires enough memory to load the pickle once.
+    zeroshot_pred_proba = load_pkl.load(str(result_root / 'zeroshot_pred_proba_2022_10_13_zs.pkl'))
+    zeroshot_pred_proba_store = ZeroshotPredProbaStore(path=str(result_root / 'zeroshot_pred_proba_2022_10_13_zs'))
+    zeroshot_pred_proba_store.save(zeroshot_pred_proba=zeroshot_pred_proba)
@@ -23,6 +23,8 @@ if __name__ == '__main__':
     #  For 10-fold with 20 rounds on ray: 1.49s * 20 * 10 = 298s
     #  For LOO with 20 rounds on ray: 1.49s * 20 * 60 = 1788s
     backend = 'ray'
+    # Scoring SingleBest configs is cheap, so it is faster to run CV folds in parallel than configs within a fold
+    parallel_folds = True
 
     configs = get_configs_small()
 
@@ -46,6 +48,7 @@ if __name__ == '__main__':
             n_splits=5,
             configs=configs,
             backend=backend,
+            parallel_folds=parallel_folds,
         )
         score = np.mean([r['score'] for r in results])
         print(f'{problem_type}: {score} | {len_datasets}')
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def df_results_by_dataset() -> pd.DataFrame:
+    """
+    Synthetic results of 30 configs on 40 datasets. Validation scores and ranks take few distinct values so that ties
+    are frequent and some results are missing.
+    """
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(30):
+        for j in range(40):
+            if rng.random() < 0.1:
+                continue
+            rows.append({
+                'framework': f'config_{i}',
+                'dataset': f'{j}_0',
+                'score_val': float(rng.integers(0, 5)),
+                'rank': float(rng.integers(2, 20)) / 2,
+            })
+    return pd.DataFrame(rows)
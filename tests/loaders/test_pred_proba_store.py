@@ -0,0 +1,61 @@
+import numpy as np
+
+from autogluon_zeroshot.loaders import ZeroshotPredProbaStore
+
+
+def make_zeroshot_pred_proba(tasks: list, folds: list, models: list, num_classes: int) -> dict:
+    rng = np.random.default_rng(0)
+    shape = (20,) if num_classes == 2 else (20, num_classes)
+    return {
+        task: {
+            fold: {
+                split: {model: rng.random(shape) for model in models}
+                for split in ['pred_proba_dict_val', 'pred_proba_dict_test']
+            }
+            for fold in folds
+        }
+        for task in tasks
+    }
+
+
+def assert_pred_proba_equal(zeroshot_pred_proba: dict, expected: dict):
+    assert list(zeroshot_pred_proba.keys()) == list(expected.keys())
+    for task in expected:
+        assert list(zeroshot_pred_proba[task].keys()) == list(expected[task].keys())
+        for fold in expected[task]:
+            for split in ['pred_proba_dict_val', 'pred_proba_dict_test']:
+                pred_proba_dict = zeroshot_pred_proba[task][fold][split]
+                assert list(pred_proba_dict.keys()) == list(expected[task][fold][split].keys())
+                for model, pred_proba in expected[task][fold][split].items():
+                    assert np.array_equal(pred_proba_dict[model], pred_proba)
+
+
+def test_save_load(tmp_path):
+    models = ['CatBoost_r1', 'LightGBM_r2', 'NeuralNetFastAI_r3']
+    zeroshot_pred_proba = {
+        **make_zeroshot_pred_proba(tasks=['2dplanes', 'adult'], folds=[0, 1, 2], models=models, num_classes=2),
+        **make_zeroshot_pred_proba(tasks=['covertype'], folds=[0, 1, 2], models=models, num_classes=4),
+    }
+    store = ZeroshotPredProbaStore(path=str(tmp_path / 'store'))
+    store.save(zeroshot_pred_proba)
+
+    assert store.get_tasks() == ['2dplanes', 'adult', 'covertype']
+    assert store.get_folds(task='adult') == [0, 1, 2]
+    assert_pred_proba_equal(store.load(), zeroshot_pred_proba)
+
+
+def test_load_subset(tmp_path):
+    models = ['CatBoost_r1', 'LightGBM_r2']
+    zeroshot_pred_proba = make_zeroshot_pred_proba(
+        tasks=['2dplanes', 'adult', 'covertype'], folds=[0, 1, 2], models=models, num_classes=3
+    )
+    store = ZeroshotPredProbaStore(path=str(tmp_path / 'store'))
+    store.save(zeroshot_pred_proba)
+
+    # fold 9 is not in the store and is skipped
+    loaded = store.load(tasks=['covertype', 'adult'], folds=[0, 2, 9])
+    expected = {
+        task: {fold: zeroshot_pred_proba[task][fold] for fold in [0, 2]}
+        for task in ['covertype', 'adult']
+    }
+    assert_pred_proba_equal(loaded, expected)
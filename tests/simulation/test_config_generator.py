@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from autogluon_zeroshot.simulation.config_generator import ZeroshotConfigGenerator
+from autogluon_zeroshot.simulation.single_best_config_scorer import SingleBestConfigScorer
+
+
+def select_reference(config_scorer, configs: list, num_zeroshot: int) -> list:
+    # greedy selection scoring each candidate from scratch, the first config is picked in case of ties
+    zeroshot_configs = []
+    for _ in range(num_zeroshot):
+        candidates = [c for c in configs if c not in zeroshot_configs]
+        scores = [config_scorer.score(zeroshot_configs + [c]) for c in candidates]
+        zeroshot_configs.append(candidates[int(np.nanargmin(scores))])
+    return zeroshot_configs
+
+
+def test_select_sequential(df_results_by_dataset):
+    config_scorer = SingleBestConfigScorer(df_results_by_dataset=df_results_by_dataset)
+    configs = list(df_results_by_dataset['framework'].unique())
+    prior_configs = ['config_3', 'config_1']
+    candidates = [c for c in configs if c not in prior_configs]
+    best_config, best_score = ZeroshotConfigGenerator._select_sequential(candidates, prior_configs, config_scorer)
+    scores = [config_scorer.score(prior_configs + [c]) for c in candidates]
+    assert best_config == candidates[int(np.nanargmin(scores))]
+    assert np.isclose(best_score, np.nanmin(scores))
+
+
+def test_select_zeroshot_configs_sequential(df_results_by_dataset):
+    config_scorer = SingleBestConfigScorer(df_results_by_dataset=df_results_by_dataset)
+    configs = list(df_results_by_dataset['framework'].unique())
+    zs_config_generator = ZeroshotConfigGenerator(config_scorer=config_scorer, configs=configs, backend='sequential')
+    zeroshot_configs = zs_config_generator.select_zeroshot_configs(8, removal_stage=False)
+    assert zeroshot_configs == select_reference(config_scorer, configs, num_zeroshot=8)
+
+
+def test_select_zeroshot_configs_ray_matches_sequential(df_results_by_dataset):
+    ray = pytest.importorskip('ray')
+    ray.init(num_cpus=2)
+    config_scorer = SingleBestConfigScorer(df_results_by_dataset=df_results_by_dataset)
+    configs = list(df_results_by_dataset['framework'].unique())
+    try:
+        zeroshot_configs = {
+            backend: ZeroshotConfigGenerator(
+                config_scorer=config_scorer, configs=configs, backend=backend
+            ).select_zeroshot_configs(8, removal_stage=False)
+            for backend in ['sequential', 'ray']
+        }
+    finally:
+        ray.shutdown()
+    assert zeroshot_configs['ray'] == zeroshot_configs['sequential']
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from autogluon_zeroshot.simulation.single_best_config_scorer import SingleBestConfigScorer
+
+
+def score_reference(df_results_by_dataset: pd.DataFrame, configs: list) -> float:
+    # on each dataset, picks the first config with the best validation score among the configs having a result
+    df = df_results_by_dataset[df_results_by_dataset['framework'].isin(configs)].copy()
+    df['order'] = df['framework'].map({config: i for i, config in enumerate(configs)})
+    df = df.sort_values(['dataset', 'score_val', 'order'], ascending=[True, False, True])
+    return df.groupby('dataset').head(1)['rank'].mean()
+
+
+def test_score(df_results_by_dataset):
+    config_scorer = SingleBestConfigScorer(df_results_by_dataset=df_results_by_dataset)
+    configs = ['config_3', 'config_1', 'config_7', 'config_12']
+    assert np.isclose(config_scorer.score(configs), score_reference(df_results_by_dataset, configs))
+
+
+def test_score_batch_greedy_iterations(df_results_by_dataset):
+    # score_batch caches sums between calls where prior configs grow by one config, checks that scores match scoring
+    # every config list from scratch over several greedy iterations
+    config_scorer = SingleBestConfigScorer(df_results_by_dataset=df_results_by_dataset)
+    all_configs = list(df_results_by_dataset['framework'].unique())
+    prior_configs = []
+    for _ in range(10):
+        candidates = [c for c in all_configs if c not in prior_configs]
+        scores = config_scorer.score_batch(prior_configs, candidates)
+        expected_scores = np.array([config_scorer.score(prior_configs + [c]) for c in candidates])
+        assert np.allclose(scores, expected_scores)
+        assert np.nanargmin(scores) == np.nanargmin(expected_scores)
+        prior_configs.append(candidates[int(np.nanargmin(scores))])
+
+
+def test_subset(df_results_by_dataset):
+    config_scorer = SingleBestConfigScorer(df_results_by_dataset=df_results_by_dataset)
+    datasets = ['1_0', '5_0', '3_0']
+    config_scorer_subset = config_scorer.subset(datasets=datasets)
+    configs = ['config_3', 'config_1', 'config_7']
+    df_subset = df_results_by_dataset[df_results_by_dataset['dataset'].isin(datasets)]
+    assert np.isclose(config_scorer_subset.score(configs), score_reference(df_subset, configs))
+
+
+def test_score_leave_one_out(df_results_by_dataset):
+    config_scorer = SingleBestConfigScorer(df_results_by_dataset=df_results_by_dataset)
+    configs = ['config_3', 'config_1', 'config_7', 'config_12', 'config_20', 'config_0']
+    expected_scores = [config_scorer.score(configs[:i] + configs[i + 1:]) for i in range(len(configs))]
+    assert np.allclose(config_scorer.score_leave_one_out(configs), expected_scores)
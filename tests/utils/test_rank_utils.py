@@ -0,0 +1,11 @@
+import numpy as np
+
+from autogluon_zeroshot.utils.rank_utils import get_rank, get_rank_sorted
+
+
+def test_get_rank_sorted():
+    error_lst = [0.3, 0.1, 0.2, 0.2, 0.5, np.nan]
+    # errors tied with one or several errors of the list, outside its range and NaN
+    errors = np.array([0.2, 0.1, 0.5, 0.25, 0.0, 0.7, np.nan])
+    ranks = get_rank_sorted(errors, np.sort(np.array(error_lst)))
+    assert np.array_equal(ranks, [get_rank(error, error_lst) for error in errors])